@@ -1,17 +1,56 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Index, create_engine, event
+from sqlalchemy.orm import selectinload, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
+from geolocation import bounding_box
 from models import Base, Hospital, Organ, OrganAvailability, TransplantProgram, PatientRequest, SearchResult
 import json
 import os
+import numpy as np
 
 # Database configuration
 DATABASE_URL = "sqlite:///./organ_transplant.db"
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if ":memory:" in DATABASE_URL:
+    # Every connection to :memory: is a separate database, so share one
+    pool_args = {"poolclass": StaticPool}
+else:
+    # Persistent connections keep the PRAGMAs below applied across requests;
+    # sized for FastAPI's default 40-thread pool for sync endpoints
+    pool_args = {"poolclass": QueuePool, "pool_size": 10, "max_overflow": 30}
+engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, **pool_args)
+
+@event.listens_for(engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Enable WAL journaling and tuned PRAGMAs on every new SQLite connection"""
+    # WAL needs a file on disk; in-memory databases keep their defaults
+    if ":memory:" in DATABASE_URL:
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    cursor.execute("PRAGMA mmap_size=268435456")  # 256 MB memory-mapped I/O
+    cursor.close()
+
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Composite indexes for the organ search path
+search_indexes = (
+    Index(
+        "ix_avail_organ_blood",
+        OrganAvailability.__table__.c.organ_id,
+        OrganAvailability.__table__.c.is_available,
+        OrganAvailability.__table__.c.blood_type
+    ),
+    Index("ix_hospital_latlon", Hospital.__table__.c.latitude, Hospital.__table__.c.longitude),
+)
 
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
+    # create_all skips indexes on tables that already exist
+    for index in search_indexes:
+        index.create(bind=engine, checkfirst=True)
 
 def get_db():
     """Dependency to get database session"""
@@ -21,171 +60,218 @@ def get_db():
     finally:
         db.close()
 
+def get_db_readonly():
+    """
+    Dependency to get a database session for read-only endpoints
+    Nothing is ever flushed or committed; the read transaction is rolled back on close
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.rollback()
+        db.close()
+
+def hospitals_with_availability(db):
+    """
+    Load all hospitals with their organ availabilities eagerly loaded
+    selectinload batches each relationship into one IN query instead of a query per hospital
+    """
+    return db.query(Hospital).options(
+        selectinload(Hospital.organ_availabilities).selectinload(OrganAvailability.organ)
+    ).all()
+
+def hospitals_in_bounding_box(db, latitude: float, longitude: float, max_distance_km: float):
+    """
+    Load hospitals inside the bounding box around a point
+    The latitude/longitude range scan runs in SQLite on ix_hospital_latlon; callers
+    refine the survivors with GeolocationService.find_nearest_hospitals
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, max_distance_km)
+    return db.query(Hospital).filter(
+        Hospital.latitude.between(min_lat, max_lat),
+        Hospital.longitude.between(min_lon, max_lon)
+    ).all()
+
 def init_sample_data():
     """Initialize database with sample hospital and organ data"""
     db = SessionLocal()
     
     try:
-        # Check if data already exists
-        if db.query(Hospital).count() > 0:
-            print("Sample data already exists")
-            return
-        
-        # Sample organs
-        organs_data = [
-            {"name": "Heart", "description": "Heart transplant", "urgency_level": 4, "preservation_time_hours": 4},
-            {"name": "Liver", "description": "Liver transplant", "urgency_level": 3, "preservation_time_hours": 12},
-            {"name": "Kidney", "description": "Kidney transplant", "urgency_level": 2, "preservation_time_hours": 24},
-            {"name": "Lung", "description": "Lung transplant", "urgency_level": 4, "preservation_time_hours": 6},
-            {"name": "Pancreas", "description": "Pancreas transplant", "urgency_level": 3, "preservation_time_hours": 12},
-            {"name": "Cornea", "description": "Cornea transplant", "urgency_level": 1, "preservation_time_hours": 72},
-            {"name": "Bone Marrow", "description": "Bone marrow transplant", "urgency_level": 3, "preservation_time_hours": 48}
-        ]
-        
-        for organ_data in organs_data:
-            organ = Organ(**organ_data)
-            db.add(organ)
-        
-        # Sample hospitals in major Indian cities
-        hospitals_data = [
-            {
-                "name": "Apollo Hospitals, Chennai",
-                "address": "21 Greams Lane, Off Greams Road, Chennai",
-                "city": "Chennai",
-                "state": "Tamil Nadu",
-                "latitude": 13.0827,
-                "longitude": 80.2707,
-                "phone": "+91-44-2829-3333",
-                "email": "info@apollohospitals.com",
-                "website": "https://www.apollohospitals.com"
-            },
-            {
-                "name": "Fortis Hospital, Mumbai",
-                "address": "Mulund Goregaon Link Road, Mulund West, Mumbai",
-                "city": "Mumbai",
-                "state": "Maharashtra",
-                "latitude": 19.1700,
-                "longitude": 72.9560,
-                "phone": "+91-22-4925-0000",
-                "email": "info@fortishealthcare.com",
-                "website": "https://www.fortishealthcare.com"
-            },
-            {
-                "name": "Max Hospital, Delhi",
-                "address": "1, Press Enclave Road, Saket, New Delhi",
-                "city": "Delhi",
-                "state": "Delhi",
-                "latitude": 28.5355,
-                "longitude": 77.2110,
-                "phone": "+91-11-4055-4055",
-                "email": "info@maxhealthcare.com",
-                "website": "https://www.maxhealthcare.com"
-            },
-            {
-                "name": "Narayana Health, Bangalore",
-                "address": "258/A, Bommasandra Industrial Area, Hosur Road, Bangalore",
-                "city": "Bangalore",
-                "state": "Karnataka",
-                "latitude": 12.9716,
-                "longitude": 77.5946,
-                "phone": "+91-80-6750-6750",
-                "email": "info@narayanahealth.org",
-                "website": "https://www.narayanahealth.org"
-            },
-            {
-                "name": "Medanta Hospital, Gurgaon",
-                "address": "Sector 38, Gurgaon, Haryana",
-                "city": "Gurgaon",
-                "state": "Haryana",
-                "latitude": 28.4595,
-                "longitude": 77.0266,
-                "phone": "+91-124-414-1414",
-                "email": "info@medanta.org",
-                "website": "https://www.medanta.org"
-            },
-            {
-                "name": "Kokilaben Hospital, Mumbai",
-                "address": "Rao Saheb Achutrao Patwardhan Marg, Four Bungalows, Andheri West, Mumbai",
-                "city": "Mumbai",
-                "state": "Maharashtra",
-                "latitude": 19.1136,
-                "longitude": 72.8367,
-                "phone": "+91-22-3099-9999",
-                "email": "info@kokilabenhospital.com",
-                "website": "https://www.kokilabenhospital.com"
-            },
-            {
-                "name": "Manipal Hospital, Bangalore",
-                "address": "98, HAL Airport Road, Bangalore",
-                "city": "Bangalore",
-                "state": "Karnataka",
-                "latitude": 12.9716,
-                "longitude": 77.5946,
-                "phone": "+91-80-2502-4444",
-                "email": "info@manipalhospitals.com",
-                "website": "https://www.manipalhospitals.com"
-            },
-            {
-                "name": "AIIMS, New Delhi",
-                "address": "Ansari Nagar, New Delhi",
-                "city": "Delhi",
-                "state": "Delhi",
-                "latitude": 28.5679,
-                "longitude": 77.2090,
-                "phone": "+91-11-2658-8500",
-                "email": "info@aiims.edu",
-                "website": "https://www.aiims.edu"
-            }
-        ]
-        
-        for hospital_data in hospitals_data:
-            hospital = Hospital(**hospital_data)
-            db.add(hospital)
-        
-        db.commit()
-        
-        # Add organ availability for some hospitals
-        hospitals = db.query(Hospital).all()
-        organs = db.query(Organ).all()
-        
-        # Create some sample organ availability
-        import random
-        for hospital in hospitals[:5]:  # First 5 hospitals
-            for organ in organs:
-                if random.choice([True, False]):  # Random availability
-                    availability = OrganAvailability(
-                        hospital_id=hospital.id,
-                        organ_id=organ.id,
-                        is_available=True,
-                        quantity=random.randint(1, 3),
-                        blood_type=random.choice(["A+", "B+", "O+", "AB+", "A-", "B-", "O-", "AB-"]),
-                        age_range=random.choice(["18-65", "pediatric", "senior"]),
-                        condition=random.choice(["excellent", "good", "fair"]),
-                        notes=f"Available at {hospital.name}"
-                    )
-                    db.add(availability)
-        
-        # Add transplant programs
-        for hospital in hospitals:
-            for organ in organs[:3]:  # First 3 organs for each hospital
-                program = TransplantProgram(
-                    hospital_id=hospital.id,
-                    organ_id=organ.id,
-                    program_name=f"{organ.name} Transplant Program",
-                    is_active=True,
-                    success_rate=random.uniform(85, 98),
-                    average_wait_time_days=random.randint(30, 365),
-                    program_description=f"Comprehensive {organ.name} transplant program",
-                    requirements="Standard transplant criteria apply"
+        with db.begin():
+            # Check if data already exists
+            if db.query(Hospital).count() > 0:
+                print("Sample data already exists")
+                return
+            
+            # Sample organs
+            organs_data = [
+                {"name": "Heart", "description": "Heart transplant", "urgency_level": 4, "preservation_time_hours": 4},
+                {"name": "Liver", "description": "Liver transplant", "urgency_level": 3, "preservation_time_hours": 12},
+                {"name": "Kidney", "description": "Kidney transplant", "urgency_level": 2, "preservation_time_hours": 24},
+                {"name": "Lung", "description": "Lung transplant", "urgency_level": 4, "preservation_time_hours": 6},
+                {"name": "Pancreas", "description": "Pancreas transplant", "urgency_level": 3, "preservation_time_hours": 12},
+                {"name": "Cornea", "description": "Cornea transplant", "urgency_level": 1, "preservation_time_hours": 72},
+                {"name": "Bone Marrow", "description": "Bone marrow transplant", "urgency_level": 3, "preservation_time_hours": 48}
+            ]
+            
+            # Sample hospitals in major Indian cities
+            hospitals_data = [
+                {
+                    "name": "Apollo Hospitals, Chennai",
+                    "address": "21 Greams Lane, Off Greams Road, Chennai",
+                    "city": "Chennai",
+                    "state": "Tamil Nadu",
+                    "latitude": 13.0827,
+                    "longitude": 80.2707,
+                    "phone": "+91-44-2829-3333",
+                    "email": "info@apollohospitals.com",
+                    "website": "https://www.apollohospitals.com"
+                },
+                {
+                    "name": "Fortis Hospital, Mumbai",
+                    "address": "Mulund Goregaon Link Road, Mulund West, Mumbai",
+                    "city": "Mumbai",
+                    "state": "Maharashtra",
+                    "latitude": 19.1700,
+                    "longitude": 72.9560,
+                    "phone": "+91-22-4925-0000",
+                    "email": "info@fortishealthcare.com",
+                    "website": "https://www.fortishealthcare.com"
+                },
+                {
+                    "name": "Max Hospital, Delhi",
+                    "address": "1, Press Enclave Road, Saket, New Delhi",
+                    "city": "Delhi",
+                    "state": "Delhi",
+                    "latitude": 28.5355,
+                    "longitude": 77.2110,
+                    "phone": "+91-11-4055-4055",
+                    "email": "info@maxhealthcare.com",
+                    "website": "https://www.maxhealthcare.com"
+                },
+                {
+                    "name": "Narayana Health, Bangalore",
+                    "address": "258/A, Bommasandra Industrial Area, Hosur Road, Bangalore",
+                    "city": "Bangalore",
+                    "state": "Karnataka",
+                    "latitude": 12.9716,
+                    "longitude": 77.5946,
+                    "phone": "+91-80-6750-6750",
+                    "email": "info@narayanahealth.org",
+                    "website": "https://www.narayanahealth.org"
+                },
+                {
+                    "name": "Medanta Hospital, Gurgaon",
+                    "address": "Sector 38, Gurgaon, Haryana",
+                    "city": "Gurgaon",
+                    "state": "Haryana",
+                    "latitude": 28.4595,
+                    "longitude": 77.0266,
+                    "phone": "+91-124-414-1414",
+                    "email": "info@medanta.org",
+                    "website": "https://www.medanta.org"
+                },
+                {
+                    "name": "Kokilaben Hospital, Mumbai",
+                    "address": "Rao Saheb Achutrao Patwardhan Marg, Four Bungalows, Andheri West, Mumbai",
+                    "city": "Mumbai",
+                    "state": "Maharashtra",
+                    "latitude": 19.1136,
+                    "longitude": 72.8367,
+                    "phone": "+91-22-3099-9999",
+                    "email": "info@kokilabenhospital.com",
+                    "website": "https://www.kokilabenhospital.com"
+                },
+                {
+                    "name": "Manipal Hospital, Bangalore",
+                    "address": "98, HAL Airport Road, Bangalore",
+                    "city": "Bangalore",
+                    "state": "Karnataka",
+                    "latitude": 12.9716,
+                    "longitude": 77.5946,
+                    "phone": "+91-80-2502-4444",
+                    "email": "info@manipalhospitals.com",
+                    "website": "https://www.manipalhospitals.com"
+                },
+                {
+                    "name": "AIIMS, New Delhi",
+                    "address": "Ansari Nagar, New Delhi",
+                    "city": "Delhi",
+                    "state": "Delhi",
+                    "latitude": 28.5679,
+                    "longitude": 77.2090,
+                    "phone": "+91-11-2658-8500",
+                    "email": "info@aiims.edu",
+                    "website": "https://www.aiims.edu"
+                }
+            ]
+            
+            # return_defaults fills in each dict's "id" so the rows below can
+            # reference them without querying the tables back
+            db.bulk_insert_mappings(Organ, organs_data, return_defaults=True)
+            db.bulk_insert_mappings(Hospital, hospitals_data, return_defaults=True)
+            
+            # Add organ availability for some hospitals
+            hospitals = hospitals_data
+            organs = organs_data
+            
+            # Create some sample organ availability, drawing every random
+            # value for all hospital/organ pairs in one batch per column
+            rng = np.random.default_rng()
+            pairs = [(hospital, organ) for hospital in hospitals[:5] for organ in organs]  # First 5 hospitals
+            count = len(pairs)
+            avail_rows = [
+                {
+                    "hospital_id": hospital["id"],
+                    "organ_id": organ["id"],
+                    "is_available": True,
+                    "quantity": quantity,
+                    "blood_type": blood_type,
+                    "age_range": age_range,
+                    "condition": condition,
+                    "notes": f"Available at {hospital['name']}"
+                }
+                for (hospital, organ), is_available, quantity, blood_type, age_range, condition in zip(
+                    pairs,
+                    rng.integers(0, 2, size=count, dtype=bool).tolist(),  # Random availability
+                    rng.integers(1, 4, size=count).tolist(),
+                    rng.choice(["A+", "B+", "O+", "AB+", "A-", "B-", "O-", "AB-"], size=count).tolist(),
+                    rng.choice(["18-65", "pediatric", "senior"], size=count).tolist(),
+                    rng.choice(["excellent", "good", "fair"], size=count).tolist()
                 )
-                db.add(program)
-        
-        db.commit()
+                if is_available
+            ]
+            # Core executemany insert; these rows never need ORM identities
+            if avail_rows:
+                db.execute(OrganAvailability.__table__.insert(), avail_rows)
+            
+            # Add transplant programs
+            pairs = [(hospital, organ) for hospital in hospitals for organ in organs[:3]]  # First 3 organs for each hospital
+            count = len(pairs)
+            program_rows = [
+                {
+                    "hospital_id": hospital["id"],
+                    "organ_id": organ["id"],
+                    "program_name": f"{organ['name']} Transplant Program",
+                    "is_active": True,
+                    "success_rate": success_rate,
+                    "average_wait_time_days": wait_time_days,
+                    "program_description": f"Comprehensive {organ['name']} transplant program",
+                    "requirements": "Standard transplant criteria apply"
+                }
+                for (hospital, organ), success_rate, wait_time_days in zip(
+                    pairs,
+                    rng.uniform(85, 98, size=count).tolist(),
+                    rng.integers(30, 366, size=count).tolist()
+                )
+            ]
+            db.execute(TransplantProgram.__table__.insert(), program_rows)
+            
         print("Sample data initialized successfully")
         
     except Exception as e:
         print(f"Error initializing sample data: {e}")
-        db.rollback()
     finally:
         db.close()
 
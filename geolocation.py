@@ -1,17 +1,21 @@
 import math
+import numpy as np
 import requests
 from typing import List, Tuple, Dict, Optional
 from dataclasses import dataclass
 from models import Hospital, OrganAvailability
 
-@dataclass
+# Average urban driving speed used for straight-line travel time estimates
+AVERAGE_SPEED_KMH = 50.0
+
+@dataclass(slots=True)
 class Location:
     """Represents a geographical location"""
     latitude: float
     longitude: float
     address: Optional[str] = None
 
-@dataclass
+@dataclass(slots=True)
 class DistanceResult:
     """Result of distance calculation"""
     distance_km: float
@@ -19,73 +23,255 @@ class DistanceResult:
     estimated_travel_time_minutes: int
     route_summary: Optional[str] = None
 
+@dataclass
+class HospitalIndex:
+    """Hospital coordinates stored as contiguous arrays for vectorized queries"""
+    latitudes: np.ndarray
+    longitudes: np.ndarray
+    lat_rad: np.ndarray
+    lon_rad: np.ndarray
+    cos_lat: np.ndarray
+    hospitals: List  # Hospital rows, or hospital dicts for the routing service
+
+def build_hospital_index(hospitals: List, latitudes: np.ndarray, longitudes: np.ndarray) -> HospitalIndex:
+    """
+    Build a hospital index from coordinate arrays in degrees, with radians and
+    cos(latitude) precomputed; latitudes/longitudes line up with hospitals
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    lat_rad = np.radians(latitudes)
+    return HospitalIndex(
+        latitudes=latitudes,
+        longitudes=longitudes,
+        lat_rad=lat_rad,
+        lon_rad=np.radians(longitudes),
+        cos_lat=np.cos(lat_rad),
+        hospitals=hospitals
+    )
+
+def _make_haversine(radius: float):
+    """
+    Build a scalar Haversine function specialized for a sphere radius
+    The diameter and degree-to-radian factor are folded into constants and the
+    math functions bound as default arguments, so calls only touch locals
+    """
+    def haversine(lat1: float, lon1: float, lat2: float, lon2: float,
+                  _deg=math.pi / 180.0, _diameter=2 * radius,
+                  _sin=math.sin, _cos=math.cos, _asin=math.asin, _sqrt=math.sqrt) -> float:
+        lat1_rad = lat1 * _deg
+        lat2_rad = lat2 * _deg
+        
+        # Haversine formula
+        sin_dlat = _sin((lat2_rad - lat1_rad) * 0.5)
+        sin_dlon = _sin((lon2 - lon1) * _deg * 0.5)
+        
+        a = sin_dlat * sin_dlat + _cos(lat1_rad) * _cos(lat2_rad) * sin_dlon * sin_dlon
+        return _diameter * _asin(_sqrt(a))
+    
+    return haversine
+
+def _haversine_rad(lat: float,
+                   lon: float,
+                   lats_rad: np.ndarray,
+                   lons_rad: np.ndarray,
+                   cos_lats: np.ndarray,
+                   radius: float) -> np.ndarray:
+    """
+    Vectorized Haversine from one point in degrees to points already in radians
+    cos_lats holds the precomputed cosines of lats_rad, so only the single
+    query point needs trig beyond the two half-angle sines
+    """
+    lat_rad = math.radians(lat)
+    lon_rad = math.radians(lon)
+    
+    a = np.sin((lats_rad - lat_rad) * 0.5)**2 + math.cos(lat_rad) * cos_lats * np.sin((lons_rad - lon_rad) * 0.5)**2
+    return 2 * radius * np.arcsin(np.sqrt(a))
+
+def _bounding_deltas(latitude: float, max_distance_km: float, radius: float) -> Tuple[float, float]:
+    """
+    Half-widths in degrees of the latitude/longitude box enclosing every point
+    within max_distance_km of the given latitude
+    """
+    angle = max_distance_km / radius
+    lat_rad = math.radians(latitude)
+    
+    # Pad slightly so points on the boundary are left to the exact distance check
+    dlat_max = math.degrees(angle) + 1e-9
+    if angle >= math.pi / 2 - abs(lat_rad):
+        # The search circle reaches a pole, so every longitude is in range
+        return dlat_max, 180.0
+    dlon_max = math.degrees(math.asin(math.sin(angle) / math.cos(lat_rad))) + 1e-9
+    return dlat_max, dlon_max
+
+def bounding_box(latitude: float, 
+                 longitude: float, 
+                 max_distance_km: float,
+                 radius: float = 6371.0) -> Tuple[float, float, float, float]:
+    """
+    Latitude/longitude box enclosing every point within max_distance_km on a
+    sphere of the given radius (the Earth's, in km, by default)
+    Returns (min_lat, max_lat, min_lon, max_lon); the longitude range spans
+    the whole globe when the box would cross the antimeridian
+    """
+    dlat_max, dlon_max = _bounding_deltas(latitude, max_distance_km, radius)
+    min_lon = longitude - dlon_max
+    max_lon = longitude + dlon_max
+    if min_lon < -180.0 or max_lon > 180.0:
+        min_lon, max_lon = -180.0, 180.0
+    return (
+        max(latitude - dlat_max, -90.0),
+        min(latitude + dlat_max, 90.0),
+        min_lon,
+        max_lon
+    )
+
 class GeolocationService:
     """Service for geolocation and distance calculations"""
     
     def __init__(self):
         self.earth_radius_km = 6371.0
         self.earth_radius_miles = 3959.0
+        self._haversine = _make_haversine(self.earth_radius_km)
+        self._index = self._build_index([])
     
     def haversine_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """
         Calculate the great circle distance between two points on Earth using Haversine formula
         Returns distance in kilometers
         """
-        # Convert latitude and longitude from degrees to radians
-        lat1_rad = math.radians(lat1)
-        lon1_rad = math.radians(lon1)
-        lat2_rad = math.radians(lat2)
-        lon2_rad = math.radians(lon2)
-        
-        # Haversine formula
-        dlat = lat2_rad - lat1_rad
-        dlon = lon2_rad - lon1_rad
-        
-        a = math.sin(dlat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
+        return self._haversine(lat1, lon1, lat2, lon2)
+    
+    def haversine_distances(self,
+                            lat: float,
+                            lon: float,
+                            lats: np.ndarray,
+                            lons: np.ndarray) -> np.ndarray:
+        """
+        Vectorized Haversine distance from one point to arrays of points
+        Returns array of distances in kilometers
+        """
+        lats_rad = np.radians(lats)
+        return _haversine_rad(
+            lat, lon, lats_rad, np.radians(lons), np.cos(lats_rad), self.earth_radius_km
+        )
+    
+    def haversine_distances_rad(self,
+                                lat: float,
+                                lon: float,
+                                lats_rad: np.ndarray,
+                                lons_rad: np.ndarray,
+                                cos_lats: np.ndarray) -> np.ndarray:
+        """
+        Vectorized Haversine distance from one point to points with precomputed
+        radians and cos(latitude)
+        Returns array of distances in kilometers
+        """
+        return _haversine_rad(lat, lon, lats_rad, lons_rad, cos_lats, self.earth_radius_km)
+    
+    def pairwise_haversine_distances(self,
+                                     lats1: np.ndarray,
+                                     lons1: np.ndarray,
+                                     lats2: np.ndarray,
+                                     lons2: np.ndarray) -> np.ndarray:
+        """
+        Vectorized Haversine distance between corresponding pairs of points
+        Returns array of distances in kilometers
+        """
+        lats1_rad = np.radians(lats1)
+        lats2_rad = np.radians(lats2)
         
-        return self.earth_radius_km * c
+        a = np.sin((lats2_rad - lats1_rad) * 0.5)**2 + np.cos(lats1_rad) * np.cos(lats2_rad) * np.sin(np.radians(lons2 - lons1) * 0.5)**2
+        return 2 * self.earth_radius_km * np.arcsin(np.sqrt(a))
     
     def calculate_distance(self, location1: Location, location2: Location) -> DistanceResult:
         """Calculate distance between two locations"""
-        distance_km = self.haversine_distance(
+        distance_km = self._haversine(
             location1.latitude, location1.longitude,
             location2.latitude, location2.longitude
         )
         
+        return self._distance_result(distance_km)
+    
+    def _distance_result(self, distance_km: float) -> DistanceResult:
+        """Build a distance result from a distance in kilometers"""
         distance_miles = distance_km * 0.621371
         
-        # Estimate travel time (assuming average speed of 50 km/h in urban areas)
-        estimated_travel_time = int((distance_km / 50) * 60)  # Convert to minutes
-        
         return DistanceResult(
             distance_km=distance_km,
             distance_miles=distance_miles,
-            estimated_travel_time_minutes=estimated_travel_time
+            estimated_travel_time_minutes=int(self.travel_minutes(distance_km))
+        )
+    
+    def travel_minutes(self, distances_km: np.ndarray) -> np.ndarray:
+        """
+        Estimated travel time in whole minutes at AVERAGE_SPEED_KMH
+        Accepts a single distance or an array of distances in kilometers
+        """
+        return (np.asarray(distances_km) / AVERAGE_SPEED_KMH * 60).astype(int)
+    
+    def _build_index(self, hospitals: List[Hospital]) -> HospitalIndex:
+        """Extract hospital coordinates into float64 arrays with their trig precomputed"""
+        hospitals = list(hospitals)
+        return build_hospital_index(
+            hospitals,
+            np.fromiter((h.latitude for h in hospitals), dtype=np.float64, count=len(hospitals)),
+            np.fromiter((h.longitude for h in hospitals), dtype=np.float64, count=len(hospitals))
         )
     
+    def index_hospitals(self, hospitals: List[Hospital]) -> None:
+        """
+        Cache hospital coordinates on the service
+        Subsequent find_nearest_hospitals calls without a hospital list query this index
+        """
+        self._index = self._build_index(hospitals)
+    
     def find_nearest_hospitals(self, 
                              user_latitude: float, 
                              user_longitude: float, 
-                             hospitals: List[Hospital], 
-                             max_distance_km: float = 500.0) -> List[Tuple[Hospital, DistanceResult]]:
+                             hospitals: Optional[List[Hospital]] = None, 
+                             max_distance_km: float = 500.0,
+                             top_k: Optional[int] = None) -> List[Tuple[Hospital, DistanceResult]]:
         """
         Find hospitals within a specified distance from user location
-        Returns list of (hospital, distance_result) tuples sorted by distance
+        Uses the hospitals cached by index_hospitals when no list is given
+        Returns list of (hospital, distance_result) tuples sorted by distance,
+        limited to the top_k closest when top_k is given
         """
-        user_location = Location(user_latitude, user_longitude)
-        nearby_hospitals = []
+        index = self._index if hospitals is None else self._build_index(hospitals)
+        
+        # Cheap bounding box prefilter so only candidates pay for the trig
+        dlat_max, dlon_max = _bounding_deltas(user_latitude, max_distance_km, self.earth_radius_km)
+        dlon = np.abs((index.longitudes - user_longitude + 180.0) % 360.0 - 180.0)
+        candidates = np.flatnonzero(
+            (np.abs(index.latitudes - user_latitude) <= dlat_max) & (dlon <= dlon_max)
+        )
+        distances = _haversine_rad(
+            user_latitude, user_longitude,
+            index.lat_rad[candidates], index.lon_rad[candidates], index.cos_lat[candidates],
+            self.earth_radius_km
+        )
+        
+        # Keep hospitals within range
+        within = distances <= max_distance_km
+        nearby = candidates[within]
+        nearby_distances = distances[within]
         
-        for hospital in hospitals:
-            hospital_location = Location(hospital.latitude, hospital.longitude)
-            distance_result = self.calculate_distance(user_location, hospital_location)
-            
-            if distance_result.distance_km <= max_distance_km:
-                nearby_hospitals.append((hospital, distance_result))
+        # Partition out the closest top_k in O(N) before sorting only those
+        if top_k is not None and top_k < len(nearby):
+            if top_k <= 0:
+                return []
+            closest = np.argpartition(nearby_distances, top_k - 1)[:top_k]
+            nearby = nearby[closest]
+            nearby_distances = nearby_distances[closest]
         
-        # Sort by distance
-        nearby_hospitals.sort(key=lambda x: x[1].distance_km)
-        return nearby_hospitals
+        # Sort by distance (stable for ties)
+        order = np.argsort(nearby_distances, kind="stable")
+        
+        return [
+            (index.hospitals[i], self._distance_result(distance_km))
+            for i, distance_km in zip(nearby[order].tolist(), nearby_distances[order].tolist())
+        ]
     
     def get_coordinates_from_address(self, address: str) -> Optional[Location]:
         """
@@ -107,15 +293,15 @@ class GeolocationService:
         Note: This is a placeholder - in production, use Google Maps Directions API, OSRM, etc.
         """
         # For now, use straight-line distance with speed factor
-        distance_km = self.haversine_distance(start_lat, start_lon, end_lat, end_lon)
+        distance_km = self._haversine(start_lat, start_lon, end_lat, end_lon)
         
         # Adjust speed based on transport mode
         speed_kmh = {
-            "driving": 50,
+            "driving": AVERAGE_SPEED_KMH,
             "walking": 5,
             "cycling": 15,
             "public_transport": 30
-        }.get(transport_mode, 50)
+        }.get(transport_mode, AVERAGE_SPEED_KMH)
         
         travel_time_minutes = int((distance_km / speed_kmh) * 60)
         
@@ -125,6 +311,35 @@ class GeolocationService:
             estimated_travel_time_minutes=travel_time_minutes
         )
 
+# One bit per blood type, so compatibility checks are a single AND
+_BLOOD_TYPE_BITS = {
+    blood_type: 1 << bit
+    for bit, blood_type in enumerate(["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"])
+}
+
+# Simplified blood type compatibility: recipient -> compatible donors
+_COMPATIBLE_DONORS = {
+    "O-": ["O-"],
+    "O+": ["O-", "O+"],
+    "A-": ["O-", "A-"],
+    "A+": ["O-", "O+", "A-", "A+"],
+    "B-": ["O-", "B-"],
+    "B+": ["O-", "O+", "B-", "B+"],
+    "AB-": ["O-", "A-", "B-", "AB-"],
+    "AB+": ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"]
+}
+
+_BLOOD_TYPE_COMPAT_MASKS = {
+    recipient: sum(_BLOOD_TYPE_BITS[donor] for donor in donors)
+    for recipient, donors in _COMPATIBLE_DONORS.items()
+}
+
+_CONDITION_SCORES = {
+    "excellent": 0.2,
+    "good": 0.1,
+    "fair": 0.05
+}
+
 class OrganSearchService:
     """Service for searching organs and finding nearest hospitals"""
     
@@ -170,30 +385,39 @@ class OrganSearchService:
                 score += 0.2
         
         # Organ condition
-        condition_scores = {
-            "excellent": 0.2,
-            "good": 0.1,
-            "fair": 0.05
-        }
-        score += condition_scores.get(organ_availability.condition, 0)
+        score += _CONDITION_SCORES.get(organ_availability.condition, 0)
         
         return min(score, 1.0)
     
+    def get_organ_availability_scores(self, 
+                                    organ_availabilities: List[OrganAvailability], 
+                                    user_blood_type: str = None) -> np.ndarray:
+        """
+        Vectorized get_organ_availability_score over a batch of candidates
+        Returns array of scores between 0 and 1
+        """
+        count = len(organ_availabilities)
+        scores = np.full(count, 0.5)
+        
+        # Blood type compatibility
+        if user_blood_type:
+            donor_types = [availability.blood_type for availability in organ_availabilities]
+            exact = np.fromiter((donor == user_blood_type for donor in donor_types), dtype=bool, count=count)
+            donor_bits = np.fromiter((_BLOOD_TYPE_BITS.get(donor, 0) for donor in donor_types), dtype=np.int64, count=count)
+            compatible = (donor_bits & _BLOOD_TYPE_COMPAT_MASKS.get(user_blood_type, 0)) != 0
+            scores += np.where(exact, 0.3, np.where(compatible, 0.2, 0.0))
+        
+        # Organ condition
+        scores += np.fromiter(
+            (_CONDITION_SCORES.get(availability.condition, 0) for availability in organ_availabilities),
+            dtype=np.float64, count=count
+        )
+        
+        return np.minimum(scores, 1.0)
+    
     def _is_blood_type_compatible(self, recipient: str, donor: str) -> bool:
         """Check if blood types are compatible"""
-        # Simplified blood type compatibility
-        compatible_pairs = {
-            "O-": ["O-"],
-            "O+": ["O-", "O+"],
-            "A-": ["O-", "A-"],
-            "A+": ["O-", "O+", "A-", "A+"],
-            "B-": ["O-", "B-"],
-            "B+": ["O-", "O+", "B-", "B+"],
-            "AB-": ["O-", "A-", "B-", "AB-"],
-            "AB+": ["O-", "O+", "A-", "A+", "B-", "B+", "AB-", "AB+"]
-        }
-        
-        return donor in compatible_pairs.get(recipient, [])
+        return bool(_BLOOD_TYPE_COMPAT_MASKS.get(recipient, 0) & _BLOOD_TYPE_BITS.get(donor, 0))
 
 # Example usage and testing
 if __name__ == "__main__":
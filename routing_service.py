@@ -1,11 +1,112 @@
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dataclasses import dataclass
-from geolocation import GeolocationService, Location, DistanceResult
+from geolocation import GeolocationService, HospitalIndex, Location, DistanceResult, build_hospital_index
 import json
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+import time
 from datetime import datetime, timedelta
 
-@dataclass
+# Shared by every RoutingService so per-instance setup is paid once per process
+_GEO_SERVICE = GeolocationService()
+_HTTP_SESSION = requests.Session()
+_HTTP_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+_HTTP_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=64))
+_EXECUTOR = ThreadPoolExecutor(max_workers=32)
+
+# Instructions for the simplified two-step routes
+START_INSTRUCTION = "Start navigation to destination"
+CONTINUE_INSTRUCTION = "Continue to hospital destination"
+
+# Emergency speed-up factor and the fixed advice returned with emergency routes
+EMERGENCY_SPEEDUP = 0.8  # 20% faster
+EMERGENCY_RECOMMENDATIONS = (
+    "Use emergency lanes if available",
+    "Contact hospital in advance",
+    "Prepare medical documents",
+    "Have emergency contacts ready"
+)
+
+# Compact JSON templates for the fixed-shape responses; only the values vary.
+# %a renders a float as its repr, which is also its JSON form, and strings are
+# passed in already JSON-encoded
+_STEP_TEMPLATE = (
+    b'{"instruction":%s,"distance_meters":%a,"duration_seconds":%d,'
+    b'"start_location":{"latitude":%a,"longitude":%a},'
+    b'"end_location":{"latitude":%a,"longitude":%a}}'
+)
+_DIRECTIONS_TEMPLATE = (
+    b'{"route":{"start":{"latitude":%a,"longitude":%a},"end":{"latitude":%a,"longitude":%a},'
+    b'"total_distance_km":%a,"total_duration_minutes":%d,"transport_mode":%s,"estimated_arrival":"%s"},'
+    b'"steps":[%s],'
+    b'"summary":{"total_steps":%d,"estimated_travel_time":"%d minutes","estimated_distance":"%.2f km"}}'
+)
+_EMERGENCY_TEMPLATE = (
+    b'{"route":{"start":{"latitude":%a,"longitude":%a},"end":{"latitude":%a,"longitude":%a},'
+    b'"total_distance_km":%a,"total_duration_minutes":%d,"transport_mode":"emergency",'
+    b'"estimated_arrival":"%s","is_emergency":true},'
+    b'"emergency_info":{"priority":"HIGH","estimated_time_saved":"%d minutes","recommendations":'
+    + json.dumps(EMERGENCY_RECOMMENDATIONS, separators=(",", ":")).encode()
+    + b'},"steps":[%s]}'
+)
+
+def _route_priorities(distances_km: np.ndarray, durations_minutes: np.ndarray) -> np.ndarray:
+    """
+    Calculate priority scores for routes based on distance, time, and hospital factors
+    """
+    # Distance factor (closer is better)
+    distance_factor = np.maximum(0, 1 - (distances_km / 500))
+    
+    # Time factor (faster is better)
+    time_factor = np.maximum(0, 1 - (durations_minutes / 300))
+    
+    # Hospital reputation factor (if available)
+    hospital_factor = 0.5  # Default neutral score
+    
+    # Combined priority score
+    priority_scores = (
+        distance_factor * 0.4 +  # 40% distance
+        time_factor * 0.4 +     # 40% time
+        hospital_factor * 0.2   # 20% hospital quality
+    )
+    
+    return priority_scores
+
+def _rank_hospitals(geo_service: GeolocationService,
+                    user_lat: float,
+                    user_lon: float,
+                    index: HospitalIndex,
+                    top_k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Distance, travel time, priority and ranking for every cached hospital
+    Returns (order, distances_km, durations_min, priorities), each already in ranked order
+    """
+    distances_km = geo_service.haversine_distances_rad(
+        user_lat, user_lon, index.lat_rad, index.lon_rad, index.cos_lat
+    )
+    durations_min = geo_service.travel_minutes(distances_km)
+    priorities = _route_priorities(distances_km, durations_min)
+    
+    # Partition out the top_k in O(N) before sorting; keep everything tied
+    # with the k-th score so the cut matches a full stable sort
+    order = np.arange(len(priorities))
+    if top_k is not None and top_k < len(priorities):
+        if top_k <= 0:
+            order = order[:0]
+        else:
+            kth_score = -np.partition(-priorities, top_k - 1)[top_k - 1]
+            order = np.flatnonzero(priorities >= kth_score)
+    
+    # Sort by priority score (higher is better); stable, so ties keep input order
+    order = order[np.argsort(-priorities[order], kind="stable")][:top_k]
+    return order, distances_km[order], durations_min[order], priorities[order]
+
+@dataclass(slots=True, frozen=True)
 class RouteStep:
     """Represents a step in a route"""
     instruction: str
@@ -14,22 +115,201 @@ class RouteStep:
     start_location: Tuple[float, float]
     end_location: Tuple[float, float]
 
-@dataclass
+@dataclass(slots=True, frozen=True, eq=False)
+class RouteSteps:
+    """
+    Steps of a route stored as parallel arrays, one row per step
+    Indexing or iterating yields RouteStep objects built on demand
+    Compares by value like a list of RouteStep; unhashable, as that list was
+    """
+    instructions: Tuple[str, ...]
+    distances_meters: np.ndarray  # float64
+    durations_seconds: np.ndarray  # int32
+    start_locations: np.ndarray  # (steps, 2) float64 latitude/longitude
+    end_locations: np.ndarray  # (steps, 2) float64 latitude/longitude
+    
+    def __len__(self) -> int:
+        return len(self.instructions)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RouteSteps):
+            return NotImplemented
+        return (
+            self.instructions == other.instructions
+            and np.array_equal(self.distances_meters, other.distances_meters)
+            and np.array_equal(self.durations_seconds, other.durations_seconds)
+            and np.array_equal(self.start_locations, other.start_locations)
+            and np.array_equal(self.end_locations, other.end_locations)
+        )
+    
+    __hash__ = None
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[RouteStep, List[RouteStep]]:
+        # Slices give a list of RouteStep, as slicing the original list did
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not isinstance(index, (int, np.integer)):
+            raise TypeError(f"RouteSteps indices must be integers or slices, not {type(index).__name__}")
+        return RouteStep(
+            instruction=self.instructions[index],
+            distance_meters=self.distances_meters[index].item(),
+            duration_seconds=self.durations_seconds[index].item(),
+            start_location=tuple(self.start_locations[index].tolist()),
+            end_location=tuple(self.end_locations[index].tolist())
+        )
+    
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+    
+    def _columns(self, duration_scale: float = 1.0):
+        """
+        Yield (instruction, distance_meters, duration_seconds, start_lat, start_lon,
+        end_lat, end_lon) per step as Python scalars
+        Durations are scaled by duration_scale in one vectorized multiply
+        """
+        durations = self.durations_seconds
+        if duration_scale != 1.0:
+            durations = (durations * duration_scale).astype(int)
+        
+        for instruction, distance_meters, duration_seconds, (start_lat, start_lon), (end_lat, end_lon) in zip(
+            self.instructions,
+            self.distances_meters.tolist(),
+            durations.tolist(),
+            self.start_locations.tolist(),
+            self.end_locations.tolist()
+        ):
+            yield instruction, distance_meters, duration_seconds, start_lat, start_lon, end_lat, end_lon
+    
+    def serialize_json(self, duration_scale: float = 1.0) -> bytes:
+        """
+        Same steps as serialize, rendered straight to comma-joined compact JSON
+        objects without building the intermediate dicts
+        """
+        return b",".join(
+            _STEP_TEMPLATE % (json.dumps(instruction).encode(), *values)
+            for instruction, *values in self._columns(duration_scale)
+        )
+    
+    def serialize(self, duration_scale: float = 1.0) -> List[Dict]:
+        """
+        Build the JSON-ready step list straight from the arrays
+        """
+        return [
+            {
+                "instruction": instruction,
+                "distance_meters": distance_meters,
+                "duration_seconds": duration_seconds,
+                "start_location": {
+                    "latitude": start_lat,
+                    "longitude": start_lon
+                },
+                "end_location": {
+                    "latitude": end_lat,
+                    "longitude": end_lon
+                }
+            }
+            for instruction, distance_meters, duration_seconds, start_lat, start_lon, end_lat, end_lon
+            in self._columns(duration_scale)
+        ]
+
+@dataclass(slots=True)
 class Route:
     """Represents a complete route"""
     start_location: Tuple[float, float]
     end_location: Tuple[float, float]
     total_distance_km: float
     total_duration_minutes: int
-    steps: List[RouteStep]
+    steps: RouteSteps
     transport_mode: str
-    estimated_arrival: datetime
+    estimated_arrival_ts: float  # Epoch seconds
+    
+    @property
+    def estimated_arrival(self) -> datetime:
+        """Estimated arrival as a local datetime, built only when serialized"""
+        return datetime.fromtimestamp(self.estimated_arrival_ts)
+
+@dataclass(slots=True)
+class RouteSummary:
+    """Summary of a route without its steps"""
+    total_distance_km: float
+    total_duration_minutes: int
+    transport_mode: str
+    estimated_arrival_ts: float  # Epoch seconds
+    
+    @property
+    def estimated_arrival(self) -> datetime:
+        """Estimated arrival as a local datetime, built only when serialized"""
+        return datetime.fromtimestamp(self.estimated_arrival_ts)
+
+@dataclass(slots=True)
+class RouteResponseFields:
+    """Formatted route values shared by the dict and JSON bytes responses"""
+    start_lat: float
+    start_lon: float
+    end_lat: float
+    end_lon: float
+    total_distance_km: float  # Rounded to 2 decimal places
+    total_duration_minutes: int
+    time_saved_minutes: int
+    estimated_arrival: str  # ISO format
+    duration_scale: float
+
+def _route_summary(geo_service: GeolocationService,
+                   start_lat: float,
+                   start_lon: float,
+                   end_lat: float,
+                   end_lon: float) -> Tuple[float, int]:
+    """
+    Compute straight-line distance and estimated duration in minutes
+    In production, this would use actual routing APIs
+    """
+    distance_result = geo_service.calculate_distance(
+        Location(start_lat, start_lon), Location(end_lat, end_lon)
+    )
+    return distance_result.distance_km, distance_result.estimated_travel_time_minutes
+
+@lru_cache(maxsize=4096)
+def _cached_route(geo_service: GeolocationService,
+                  start: Tuple[float, float],
+                  end: Tuple[float, float]) -> Tuple[float, int, RouteSteps]:
+    """
+    Compute distance, duration and steps between two points
+    Cached at module level so every RoutingService shares routes between the
+    same rounded coordinates
+    """
+    start_lat, start_lon = start
+    end_lat, end_lon = end
+    
+    distance_km, duration_minutes = _route_summary(geo_service, start_lat, start_lon, end_lat, end_lon)
+    
+    # Simplified 2-step route via the midpoint
+    # In production, this would use actual routing APIs
+    mid_location = ((start_lat + end_lat) * 0.5, (start_lon + end_lon) * 0.5)
+    half_distance_meters = distance_km * 500.0
+    half_duration_seconds = int(distance_km * 30)  # Rough estimate
+    
+    steps = RouteSteps(
+        instructions=(START_INSTRUCTION, CONTINUE_INSTRUCTION),
+        distances_meters=np.full(2, half_distance_meters),
+        durations_seconds=np.full(2, half_duration_seconds, dtype=np.int32),
+        start_locations=np.array([start, mid_location], dtype=np.float64),
+        end_locations=np.array([mid_location, end], dtype=np.float64)
+    )
+    # Cached steps are shared by every Route served from the cache
+    for array in (steps.distances_meters, steps.durations_seconds, steps.start_locations, steps.end_locations):
+        array.flags.writeable = False
+    
+    return distance_km, duration_minutes, steps
 
 class RoutingService:
     """Service for GPS routing and navigation"""
     
     def __init__(self):
-        self.geo_service = GeolocationService()
+        self.geo_service = _GEO_SERVICE
+        # Persistent HTTP session so routing API calls reuse pooled connections
+        self.http_session = _HTTP_SESSION
+        self._hospital_index = self._build_hospital_index([])
         # In production, you would use actual routing APIs like:
         # - Google Maps Directions API
         # - OpenRouteService API
@@ -47,29 +327,42 @@ class RoutingService:
         Note: This is a simplified implementation
         In production, use actual routing APIs
         """
-        start_location = Location(start_lat, start_lon)
-        end_location = Location(end_lat, end_lon)
+        # Coordinates rounded to 5 decimal places (~1 m) share a cache entry; the
+        # route reports the rounded points so its endpoints, steps and distance agree
+        start = (round(start_lat, 5), round(start_lon, 5))
+        end = (round(end_lat, 5), round(end_lon, 5))
+        distance_km, duration_minutes, steps = _cached_route(self.geo_service, start, end)
         
-        # Calculate straight-line distance
-        distance_result = self.geo_service.calculate_distance(start_location, end_location)
-        
-        # Create simplified route steps
-        steps = self._create_simplified_route_steps(
-            start_lat, start_lon, end_lat, end_lon, distance_result.distance_km
-        )
-        
-        # Calculate estimated arrival time
-        current_time = datetime.now()
-        estimated_arrival = current_time + timedelta(minutes=distance_result.estimated_travel_time_minutes)
+        # Calculate estimated arrival time; kept outside the cache so it stays current
+        estimated_arrival_ts = time.time() + duration_minutes * 60
         
         return Route(
-            start_location=(start_lat, start_lon),
-            end_location=(end_lat, end_lon),
-            total_distance_km=distance_result.distance_km,
-            total_duration_minutes=distance_result.estimated_travel_time_minutes,
+            start_location=start,
+            end_location=end,
+            total_distance_km=distance_km,
+            total_duration_minutes=duration_minutes,
             steps=steps,
             transport_mode=transport_mode,
-            estimated_arrival=estimated_arrival
+            estimated_arrival_ts=estimated_arrival_ts
+        )
+    
+    def get_route_summary(self, 
+                          start_lat: float, 
+                          start_lon: float, 
+                          end_lat: float, 
+                          end_lon: float,
+                          transport_mode: str = "driving") -> RouteSummary:
+        """
+        Get distance, duration and arrival time between two points without
+        building route steps
+        """
+        distance_km, duration_minutes = _route_summary(self.geo_service, start_lat, start_lon, end_lat, end_lon)
+        
+        return RouteSummary(
+            total_distance_km=distance_km,
+            total_duration_minutes=duration_minutes,
+            transport_mode=transport_mode,
+            estimated_arrival_ts=time.time() + duration_minutes * 60
         )
     
     def get_directions_to_hospital(self, 
@@ -82,45 +375,52 @@ class RoutingService:
         Get detailed directions to a hospital
         """
         route = self.get_route(user_lat, user_lon, hospital_lat, hospital_lon, transport_mode)
+        fields = self._route_response_fields(route)
         
         return {
             "route": {
                 "start": {
-                    "latitude": route.start_location[0],
-                    "longitude": route.start_location[1]
+                    "latitude": fields.start_lat,
+                    "longitude": fields.start_lon
                 },
                 "end": {
-                    "latitude": route.end_location[0],
-                    "longitude": route.end_location[1]
+                    "latitude": fields.end_lat,
+                    "longitude": fields.end_lon
                 },
-                "total_distance_km": round(route.total_distance_km, 2),
-                "total_duration_minutes": route.total_duration_minutes,
+                "total_distance_km": fields.total_distance_km,
+                "total_duration_minutes": fields.total_duration_minutes,
                 "transport_mode": route.transport_mode,
-                "estimated_arrival": route.estimated_arrival.isoformat()
+                "estimated_arrival": fields.estimated_arrival
             },
-            "steps": [
-                {
-                    "instruction": step.instruction,
-                    "distance_meters": step.distance_meters,
-                    "duration_seconds": step.duration_seconds,
-                    "start_location": {
-                        "latitude": step.start_location[0],
-                        "longitude": step.start_location[1]
-                    },
-                    "end_location": {
-                        "latitude": step.end_location[0],
-                        "longitude": step.end_location[1]
-                    }
-                }
-                for step in route.steps
-            ],
+            "steps": route.steps.serialize(),
             "summary": {
                 "total_steps": len(route.steps),
-                "estimated_travel_time": f"{route.total_duration_minutes} minutes",
-                "estimated_distance": f"{route.total_distance_km:.2f} km"
+                "estimated_travel_time": f"{fields.total_duration_minutes} minutes",
+                "estimated_distance": f"{fields.total_distance_km:.2f} km"
             }
         }
     
+    def get_directions_to_hospital_json(self, 
+                                      user_lat: float, 
+                                      user_lon: float, 
+                                      hospital_lat: float, 
+                                      hospital_lon: float,
+                                      transport_mode: str = "driving") -> bytes:
+        """
+        get_directions_to_hospital rendered directly to compact JSON bytes
+        """
+        route = self.get_route(user_lat, user_lon, hospital_lat, hospital_lon, transport_mode)
+        fields = self._route_response_fields(route)
+        
+        return _DIRECTIONS_TEMPLATE % (
+            fields.start_lat, fields.start_lon, fields.end_lat, fields.end_lon,
+            fields.total_distance_km, fields.total_duration_minutes,
+            json.dumps(route.transport_mode).encode(),
+            fields.estimated_arrival.encode(),
+            route.steps.serialize_json(),
+            len(route.steps), fields.total_duration_minutes, fields.total_distance_km
+        )
+    
     def get_emergency_route(self, 
                           user_lat: float, 
                           user_lon: float, 
@@ -133,154 +433,183 @@ class RoutingService:
         route = self.get_route(user_lat, user_lon, hospital_lat, hospital_lon, "emergency")
         
         # Adjust for emergency conditions (faster speeds, priority lanes, etc.)
-        emergency_duration = int(route.total_duration_minutes * 0.8)  # 20% faster
-        emergency_arrival = datetime.now() + timedelta(minutes=emergency_duration)
+        fields = self._route_response_fields(route, duration_scale=EMERGENCY_SPEEDUP)
         
         return {
             "route": {
                 "start": {
-                    "latitude": route.start_location[0],
-                    "longitude": route.start_location[1]
+                    "latitude": fields.start_lat,
+                    "longitude": fields.start_lon
                 },
                 "end": {
-                    "latitude": route.end_location[0],
-                    "longitude": route.end_location[1]
+                    "latitude": fields.end_lat,
+                    "longitude": fields.end_lon
                 },
-                "total_distance_km": round(route.total_distance_km, 2),
-                "total_duration_minutes": emergency_duration,
+                "total_distance_km": fields.total_distance_km,
+                "total_duration_minutes": fields.total_duration_minutes,
                 "transport_mode": "emergency",
-                "estimated_arrival": emergency_arrival.isoformat(),
+                "estimated_arrival": fields.estimated_arrival,
                 "is_emergency": True
             },
             "emergency_info": {
                 "priority": "HIGH",
-                "estimated_time_saved": f"{route.total_duration_minutes - emergency_duration} minutes",
-                "recommendations": [
-                    "Use emergency lanes if available",
-                    "Contact hospital in advance",
-                    "Prepare medical documents",
-                    "Have emergency contacts ready"
-                ]
+                "estimated_time_saved": f"{fields.time_saved_minutes} minutes",
+                "recommendations": list(EMERGENCY_RECOMMENDATIONS)
             },
-            "steps": [
-                {
-                    "instruction": step.instruction,
-                    "distance_meters": step.distance_meters,
-                    "duration_seconds": int(step.duration_seconds * 0.8),  # 20% faster
-                    "start_location": {
-                        "latitude": step.start_location[0],
-                        "longitude": step.start_location[1]
-                    },
-                    "end_location": {
-                        "latitude": step.end_location[0],
-                        "longitude": step.end_location[1]
-                    }
-                }
-                for step in route.steps
-            ]
+            "steps": route.steps.serialize(duration_scale=fields.duration_scale)
         }
     
+    def get_emergency_route_json(self, 
+                               user_lat: float, 
+                               user_lon: float, 
+                               hospital_lat: float, 
+                               hospital_lon: float) -> bytes:
+        """
+        get_emergency_route rendered directly to compact JSON bytes
+        """
+        route = self.get_route(user_lat, user_lon, hospital_lat, hospital_lon, "emergency")
+        fields = self._route_response_fields(route, duration_scale=EMERGENCY_SPEEDUP)
+        
+        return _EMERGENCY_TEMPLATE % (
+            fields.start_lat, fields.start_lon, fields.end_lat, fields.end_lon,
+            fields.total_distance_km, fields.total_duration_minutes,
+            fields.estimated_arrival.encode(),
+            fields.time_saved_minutes,
+            route.steps.serialize_json(duration_scale=fields.duration_scale)
+        )
+    
+    def _route_response_fields(self, route: Route, duration_scale: float = 1.0) -> RouteResponseFields:
+        """
+        Compute the values shown in a directions or emergency response once, so
+        the dict and JSON bytes variants render the same numbers
+        Durations are scaled by duration_scale and the arrival moves earlier by
+        the time saved
+        """
+        start_lat, start_lon = route.start_location
+        end_lat, end_lon = route.end_location
+        duration_min = route.total_duration_minutes
+        if duration_scale != 1.0:
+            duration_min = int(duration_min * duration_scale)
+        time_saved_minutes = route.total_duration_minutes - duration_min
+        
+        return RouteResponseFields(
+            start_lat=float(start_lat),
+            start_lon=float(start_lon),
+            end_lat=float(end_lat),
+            end_lon=float(end_lon),
+            total_distance_km=round(float(route.total_distance_km), 2),
+            total_duration_minutes=duration_min,
+            time_saved_minutes=time_saved_minutes,
+            estimated_arrival=datetime.fromtimestamp(
+                route.estimated_arrival_ts - time_saved_minutes * 60
+            ).isoformat(),
+            duration_scale=duration_scale
+        )
+    
+    def get_routes(self, 
+                   user_lat: float, 
+                   user_lon: float, 
+                   hospitals: List[Dict],
+                   transport_mode: str = "driving") -> List[Route]:
+        """
+        Get full routes to multiple hospitals concurrently
+        Route lookups are I/O-bound once backed by a routing API, so they are
+        issued in parallel; results are returned in the order of hospitals
+        """
+        futures = [
+            _EXECUTOR.submit(
+                self.get_route,
+                user_lat, user_lon,
+                hospital["latitude"], hospital["longitude"],
+                transport_mode
+            )
+            for hospital in hospitals
+        ]
+        return [future.result() for future in futures]
+    
+    async def get_routes_async(self, 
+                               user_lat: float, 
+                               user_lon: float, 
+                               hospitals: List[Dict],
+                               transport_mode: str = "driving") -> List[Route]:
+        """
+        Async variant of get_routes for event-loop callers such as FastAPI endpoints
+        Route lookups run in the shared executor and are awaited concurrently,
+        so the event loop is never blocked; results are in the order of hospitals
+        """
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[
+            loop.run_in_executor(
+                _EXECUTOR, self.get_route,
+                user_lat, user_lon,
+                hospital["latitude"], hospital["longitude"],
+                transport_mode
+            )
+            for hospital in hospitals
+        ])
+    
+    def _build_hospital_index(self, hospitals: List[Dict]) -> HospitalIndex:
+        """Index hospital dicts by coordinates with their trig precomputed"""
+        hospitals = list(hospitals)
+        return build_hospital_index(
+            hospitals,
+            [hospital["latitude"] for hospital in hospitals],
+            [hospital["longitude"] for hospital in hospitals]
+        )
+    
+    def register_hospitals(self, hospitals: List[Dict]) -> None:
+        """
+        Cache hospital coordinates and their trig on the service
+        Subsequent get_multiple_routes calls without a hospital list rank these
+        """
+        self._hospital_index = self._build_hospital_index(hospitals)
+    
     def get_multiple_routes(self, 
                           user_lat: float, 
                           user_lon: float, 
-                          hospitals: List[Dict]) -> List[Dict]:
+                          hospitals: Optional[List[Dict]] = None,
+                          top_k: Optional[int] = None) -> List[Dict]:
         """
         Get routes to multiple hospitals and rank by travel time
+        Uses the hospitals cached by register_hospitals when no list is given
+        Returns only the top_k highest priority routes when top_k is given
         """
+        hospital_index = self._hospital_index if hospitals is None else self._build_hospital_index(hospitals)
+        order, distances_km, durations_min, priorities = _rank_hospitals(
+            self.geo_service, user_lat, user_lon, hospital_index, top_k
+        )
+        
+        current_time = datetime.now()
         routes = []
         
-        for hospital in hospitals:
-            route = self.get_route(
-                user_lat, user_lon, 
-                hospital["latitude"], hospital["longitude"]
-            )
-            
+        for index, distance_km, duration_min, priority_score in zip(
+            order.tolist(),
+            distances_km.tolist(),
+            durations_min.tolist(),
+            priorities.tolist()
+        ):
             route_info = {
-                "hospital": hospital,
+                "hospital": hospital_index.hospitals[index],
                 "route": {
-                    "total_distance_km": round(route.total_distance_km, 2),
-                    "total_duration_minutes": route.total_duration_minutes,
-                    "estimated_arrival": route.estimated_arrival.isoformat()
+                    "total_distance_km": round(distance_km, 2),
+                    "total_duration_minutes": duration_min,
+                    "estimated_arrival": (current_time + timedelta(minutes=duration_min)).isoformat()
                 },
-                "priority_score": self._calculate_route_priority(route, hospital)
+                "priority_score": priority_score
             }
             routes.append(route_info)
         
-        # Sort by priority score (higher is better)
-        routes.sort(key=lambda x: x["priority_score"], reverse=True)
-        
         return routes
-    
-    def _create_simplified_route_steps(self, 
-                                     start_lat: float, 
-                                     start_lon: float, 
-                                     end_lat: float, 
-                                     end_lon: float, 
-                                     total_distance_km: float) -> List[RouteStep]:
-        """
-        Create simplified route steps
-        In production, this would use actual routing APIs
-        """
-        steps = []
-        
-        # Calculate midpoint for a simple 2-step route
-        mid_lat = (start_lat + end_lat) / 2
-        mid_lon = (start_lon + end_lon) / 2
-        
-        # Step 1: Start to midpoint
-        step1_distance = total_distance_km * 0.5 * 1000  # Convert to meters
-        step1_duration = int(step1_distance / 1000 * 60)  # Rough estimate
-        
-        steps.append(RouteStep(
-            instruction="Start navigation to destination",
-            distance_meters=step1_distance,
-            duration_seconds=step1_duration,
-            start_location=(start_lat, start_lon),
-            end_location=(mid_lat, mid_lon)
-        ))
-        
-        # Step 2: Midpoint to end
-        step2_distance = total_distance_km * 0.5 * 1000
-        step2_duration = int(step2_distance / 1000 * 60)
-        
-        steps.append(RouteStep(
-            instruction="Continue to hospital destination",
-            distance_meters=step2_distance,
-            duration_seconds=step2_duration,
-            start_location=(mid_lat, mid_lon),
-            end_location=(end_lat, end_lon)
-        ))
-        
-        return steps
-    
-    def _calculate_route_priority(self, route: Route, hospital: Dict) -> float:
-        """
-        Calculate priority score for route based on distance, time, and hospital factors
-        """
-        # Distance factor (closer is better)
-        distance_factor = max(0, 1 - (route.total_distance_km / 500))
-        
-        # Time factor (faster is better)
-        time_factor = max(0, 1 - (route.total_duration_minutes / 300))
-        
-        # Hospital reputation factor (if available)
-        hospital_factor = 0.5  # Default neutral score
-        
-        # Combined priority score
-        priority_score = (
-            distance_factor * 0.4 +  # 40% distance
-            time_factor * 0.4 +     # 40% time
-            hospital_factor * 0.2   # 20% hospital quality
-        )
-        
-        return priority_score
 
 class NavigationService:
     """Service for real-time navigation and tracking"""
     
+    # Least recently updated sessions are evicted beyond this many
+    max_active_navigations = 10000
+    
     def __init__(self):
         self.routing_service = RoutingService()
-        self.active_navigations = {}  # Track active navigation sessions
+        self.active_navigations = OrderedDict()  # Track active navigation sessions
     
     def start_navigation(self, 
                         user_id: str, 
@@ -292,7 +621,7 @@ class NavigationService:
         """
         Start a navigation session
         """
-        navigation_id = f"nav_{user_id}_{datetime.now().timestamp()}"
+        navigation_id = f"nav_{user_id}_{time.time()}"
         
         route = self.routing_service.get_route(
             start_lat, start_lon, end_lat, end_lon, transport_mode
@@ -301,13 +630,15 @@ class NavigationService:
         navigation_session = {
             "id": navigation_id,
             "user_id": user_id,
-            "route": route,
+            "destination": route.end_location,
             "current_step": 0,
-            "started_at": datetime.now(),
+            "started_at_ns": time.monotonic_ns(),
             "status": "active"
         }
         
         self.active_navigations[navigation_id] = navigation_session
+        if len(self.active_navigations) > self.max_active_navigations:
+            self.active_navigations.popitem(last=False)
         
         return {
             "navigation_id": navigation_id,
@@ -317,9 +648,9 @@ class NavigationService:
                 "estimated_arrival": route.estimated_arrival.isoformat()
             },
             "current_step": {
-                "instruction": route.steps[0].instruction,
-                "distance_meters": route.steps[0].distance_meters,
-                "duration_seconds": route.steps[0].duration_seconds
+                "instruction": route.steps.instructions[0],
+                "distance_meters": route.steps.distances_meters[0].item(),
+                "duration_seconds": route.steps.durations_seconds[0].item()
             },
             "status": "started"
         }
@@ -331,27 +662,83 @@ class NavigationService:
         """
         Update navigation with current position
         """
-        if navigation_id not in self.active_navigations:
+        # Single lookup: a concurrent end_navigation or eviction may remove the session
+        session = self.active_navigations.get(navigation_id)
+        if session is None:
             return {"error": "Navigation session not found"}
         
-        session = self.active_navigations[navigation_id]
-        route = session["route"]
-        
         # Calculate distance to destination
         current_location = Location(current_lat, current_lon)
-        destination = Location(route.end_location[0], route.end_location[1])
+        destination = Location(session["destination"][0], session["destination"][1])
         remaining_distance = self.routing_service.geo_service.calculate_distance(
             current_location, destination
         )
         
+        return self._record_position(
+            navigation_id, session, current_lat, current_lon,
+            remaining_distance.distance_km, remaining_distance.estimated_travel_time_minutes
+        )
+    
+    def update_navigations(self, updates: List[Tuple[str, float, float]]) -> List[Dict]:
+        """
+        Update many navigation sessions with their current positions at once
+        Takes (navigation_id, current_lat, current_lon) tuples; remaining distances
+        for all of them are computed in one vectorized pass
+        Returns one result per update, in order
+        """
+        sessions = [self.active_navigations.get(navigation_id) for navigation_id, _, _ in updates]
+        found = [
+            (update, session)
+            for update, session in zip(updates, sessions)
+            if session is not None
+        ]
+        
+        # Calculate distance to destination for every known session
+        remaining_km = self.routing_service.geo_service.pairwise_haversine_distances(
+            np.array([update[1] for update, _ in found], dtype=np.float64),
+            np.array([update[2] for update, _ in found], dtype=np.float64),
+            np.array([session["destination"][0] for _, session in found], dtype=np.float64),
+            np.array([session["destination"][1] for _, session in found], dtype=np.float64)
+        )
+        remaining_minutes = self.routing_service.geo_service.travel_minutes(remaining_km)
+        
+        results = []
+        remaining = zip(remaining_km.tolist(), remaining_minutes.tolist())
+        for (navigation_id, current_lat, current_lon), session in zip(updates, sessions):
+            if session is None:
+                results.append({"error": "Navigation session not found"})
+                continue
+            distance_km, minutes = next(remaining)
+            results.append(self._record_position(
+                navigation_id, session, current_lat, current_lon, distance_km, minutes
+            ))
+        
+        return results
+    
+    def _record_position(self, 
+                         navigation_id: str, 
+                         session: Dict, 
+                         current_lat: float, 
+                         current_lon: float, 
+                         remaining_km: float, 
+                         remaining_minutes: int) -> Dict:
+        """
+        Store the latest position on a session and build its update result
+        The session may have been ended or evicted since it was looked up
+        """
+        try:
+            self.active_navigations.move_to_end(navigation_id)
+        except KeyError:
+            return {"error": "Navigation session not found"}
+        
         # Update session
-        session["last_update"] = datetime.now()
+        session["last_update_ns"] = time.monotonic_ns()
         session["current_position"] = (current_lat, current_lon)
         
         return {
             "navigation_id": navigation_id,
-            "remaining_distance_km": round(remaining_distance.distance_km, 2),
-            "estimated_time_remaining_minutes": remaining_distance.estimated_travel_time_minutes,
+            "remaining_distance_km": round(remaining_km, 2),
+            "estimated_time_remaining_minutes": remaining_minutes,
             "current_step": session["current_step"],
             "status": "active"
         }
@@ -360,17 +747,14 @@ class NavigationService:
         """
         End a navigation session
         """
-        if navigation_id not in self.active_navigations:
+        session = self.active_navigations.pop(navigation_id, None)
+        if session is None:
             return {"error": "Navigation session not found"}
         
-        session = self.active_navigations[navigation_id]
-        session["status"] = "completed"
-        session["ended_at"] = datetime.now()
-        
         return {
             "navigation_id": navigation_id,
             "status": "completed",
-            "duration_minutes": int((session["ended_at"] - session["started_at"]).total_seconds() / 60)
+            "duration_minutes": (time.monotonic_ns() - session["started_at_ns"]) // 60_000_000_000
         }
 
 # Example usage